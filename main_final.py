@@ -1,136 +1,361 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import os
+import posixpath
+import re
 import socket
+import sys
 import shlex
 import argparse
+import atexit
 import yaml
 import csv
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import getpass
 import hashlib
-import json
+import io
 
 class VFS:
     """Виртуальная файловая система"""
+    PATH_CACHE_SIZE = 256
+    PRELOAD_WORKERS = 8
+    ENCODING = "utf-8"
+    HASH_CHUNK_SIZE = 1024 * 1024
+
     def __init__(self, physical_path=None):
         self.physical_path = physical_path
-        self.filesystem = {}
+        # Плоская таблица узлов: абсолютный путь -> узел, у директорий отсортированный список имен потомков
+        self.nodes = {}
         self.current_dir = "/"
+        self.motd = None
+        self._path_cache = OrderedDict()
         self.default_vfs = {
-            "/": {
-                "type": "directory",
-                "content": {
-                    "home": {"type": "directory", "content": {}},
-                    "etc": {"type": "directory", "content": {
-                        "motd": {"type": "file", "content": "Добро пожаловать в VFS эмульятор!"}
-                    }},
-                    "bin": {"type": "directory", "content": {}},
-                    "tmp": {"type": "directory", "content": {}}
-                }
-            }
+            "/": {"type": "directory", "children": ["bin", "etc", "home", "tmp"]},
+            "/home": {"type": "directory", "children": []},
+            "/etc": {"type": "directory", "children": ["motd"]},
+            "/etc/motd": {"type": "file", "content": "Добро пожаловать в VFS эмульятор!".encode(self.ENCODING)},
+            "/bin": {"type": "directory", "children": []},
+            "/tmp": {"type": "directory", "children": []}
         }
 
         if physical_path and os.path.exists(physical_path):
             self.load_from_directory(physical_path)
         else:
-            self.filesystem = self.default_vfs.copy()
+            self.nodes = {sys.intern(path): dict(node, children=list(node["children"])) if node["type"] == "directory" else dict(node)
+                          for path, node in self.default_vfs.items()}
+            self.motd = self.nodes["/etc/motd"]["content"]
 
     def load_from_directory(self, path):
-        """Загрузка VFS из директории"""
+        """Загрузка VFS из директории (содержимое подгружается лениво)"""
         try:
-            self.filesystem = {"/": {"type": "directory", "content": {}}}
-            self._build_vfs_from_dir(path, "/", self.filesystem["/"]["content"])
+            self.nodes = {"/": {"type": "directory", "children": None, "_real_path": path}}
+            # Ошибка чтения корня должна прерывать загрузку, а не давать пустую VFS
+            self._add_entries("/", self._scan_dir(path, strict=True))
+            self._load_motd()
             return True
         except Exception as e:
             raise Exception(f"Ошибка загрузки VFS: {str(e)}")
 
-    def _build_vfs_from_dir(self, real_path, vfs_path, vfs_node):
-        """Рекурсивное построение VFS из реальной директории"""
-        for item in os.listdir(real_path):
-            real_item_path = os.path.join(real_path, item)
-            if os.path.isdir(real_item_path):
-                vfs_node[item] = {"type": "directory", "content": {}}
-                self._build_vfs_from_dir(real_item_path, vfs_path + item + "/", vfs_node[item]["content"])
+    @staticmethod
+    def _scan_dir(real_path, strict=False):
+        """Один уровень реальной директории: (имя, реальный путь, это директория)"""
+        try:
+            with os.scandir(real_path) as it:
+                # Тип берется из записи каталога (d_type), без отдельного stat()
+                return [(entry.name, entry.path, entry.is_dir(follow_symlinks=False)) for entry in it]
+        except OSError:
+            if strict:
+                raise
+            # Директория исчезла или недоступна после старта: считаем ее пустой
+            return []
+
+    def _add_entries(self, vfs_path, entries):
+        """Добавление прочитанного уровня директории в таблицу, вложенные узлы остаются ленивыми"""
+        node = self.nodes[vfs_path]
+        prefix = vfs_path.rstrip("/") + "/"
+        intern = sys.intern
+        children = []
+        for name, real_path, is_dir in entries:
+            children.append(name)
+            if is_dir:
+                self.nodes[intern(prefix + name)] = {"type": "directory", "children": None, "_real_path": real_path}
             else:
-                try:
-                    with open(real_item_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    vfs_node[item] = {"type": "file", "content": content}
-                except:
-                    vfs_node[item] = {"type": "file", "content": f"Binary file: {item}"}
+                self.nodes[intern(prefix + name)] = {"type": "file", "content": None, "_real_path": real_path}
+        del node["_real_path"]
+        children.sort()
+        node["children"] = children
+        return children
+
+    def _build_vfs_from_dir(self, vfs_path):
+        """Чтение одного уровня реальной директории"""
+        return self._add_entries(vfs_path, self._scan_dir(self.nodes[vfs_path]["_real_path"]))
+
+    def _load_motd(self):
+        """Чтение /etc/motd сразу при загрузке, чтобы не искать его после старта"""
+        etc = self.nodes.get("/etc")
+        if etc and etc["type"] == "directory":
+            self._dir_children("/etc")
+            motd = self.nodes.get("/etc/motd")
+            if motd and motd["type"] == "file":
+                self.motd = self._read_file(motd)
+
+    def _dir_children(self, vfs_path):
+        """Имена потомков директории с подгрузкой при первом обращении"""
+        children = self.nodes[vfs_path]["children"]
+        if children is None:
+            return self._build_vfs_from_dir(vfs_path)
+        return children
+
+    @staticmethod
+    def _read_real_file(real_path):
+        """Содержимое реального файла (bytes)"""
+        try:
+            fd = os.open(real_path, os.O_RDONLY)
+            try:
+                # Блок под размер из fstat: обычный файл читается одним read(),
+                # но читаем до EOF, т.к. st_size бывает 0 (procfs) или устаревшим
+                size = max(os.fstat(fd).st_size + 1, io.DEFAULT_BUFFER_SIZE)
+                chunks = []
+                while True:
+                    chunk = os.read(fd, size)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                return b"".join(chunks)
+            finally:
+                os.close(fd)
+        except OSError:
+            return f"Unreadable file: {os.path.basename(real_path)}".encode(VFS.ENCODING)
+
+    @classmethod
+    def _hash_real_file(cls, real_path):
+        """SHA-256 реального файла блоками, без загрузки содержимого в VFS"""
+        h = hashlib.sha256()
+        try:
+            with open(real_path, 'rb', buffering=0) as f:
+                for chunk in iter(lambda: f.read(cls.HASH_CHUNK_SIZE), b""):
+                    h.update(chunk)
+        except OSError:
+            return hashlib.sha256(cls._read_real_file(real_path)).digest()
+        return h.digest()
+
+    @classmethod
+    def decode(cls, data):
+        """Текст из содержимого файла; файлы хранятся как bytes и декодируются только при выводе"""
+        return data.decode(cls.ENCODING, errors='replace')
+
+    def _read_file(self, node):
+        """Содержимое файла (bytes) с чтением при первом обращении"""
+        if node["content"] is None:
+            node["content"] = self._read_real_file(node.pop("_real_path"))
+        return node["content"]
+
+    def _preload(self, path):
+        """Параллельная подгрузка директорий и хешей непрочитанных файлов в пуле потоков"""
+        # scandir, чтение и sha256 отпускают GIL, поэтому задержки ввода-вывода
+        # перекрываются; в таблицу узлов результаты вносит только этот поток
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.PRELOAD_WORKERS) as pool:
+            stack = [path]
+            while stack or pending:
+                while stack:
+                    current = stack.pop()
+                    node = self.nodes[current]
+                    if "_hash" in node:
+                        continue  # поддерево уже захешировано, значит загружено
+                    if node["type"] == "file":
+                        if node["content"] is None and "_content_hash" not in node:
+                            pending[pool.submit(self._hash_real_file, node["_real_path"])] = current
+                    elif node["children"] is None:
+                        pending[pool.submit(self._scan_dir, node["_real_path"])] = current
+                    else:
+                        prefix = current.rstrip("/") + "/"
+                        stack.extend(prefix + name for name in node["children"])
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    current = pending.pop(future)
+                    node = self.nodes[current]
+                    if node["type"] == "file":
+                        node["_content_hash"] = future.result()
+                    else:
+                        self._add_entries(current, future.result())
+                        stack.append(current)
+
+    def _invalidate(self, path):
+        """Сброс хешей узла и его предков после изменения"""
+        while True:
+            node = self.nodes[path]
+            # Если у узла хеша нет, то и у предков его уже нет
+            if node.pop("_hash", None) is None or path == "/":
+                return
+            path = posixpath.dirname(path)
+
+    @staticmethod
+    def _hash_fields(h, *fields):
+        """Поля с префиксом длины, чтобы склейка была однозначной"""
+        for field in fields:
+            h.update(len(field).to_bytes(8, "little"))
+            h.update(field)
+
+    def _subtree_hash(self, path):
+        """SHA-256 поддерева (дерево Меркла): пересчитываются только сброшенные узлы"""
+        # Обход в обратном порядке на явном стеке: директория хешируется
+        # после всех потомков, глубина дерева не ограничена стеком вызовов
+        stack = [(path, False)]
+        while stack:
+            current, children_ready = stack.pop()
+            node = self.nodes[current]
+            if "_hash" in node:
+                continue
+            prefix = current.rstrip("/") + "/"
+            if node["type"] == "directory" and not children_ready:
+                stack.append((current, True))
+                stack.extend((prefix + name, False) for name in self._dir_children(current))
+                continue
+            h = hashlib.sha256()
+            self._hash_fields(h, node["type"].encode(), node.get("owner", "").encode())
+            if node["type"] == "file":
+                # Непрочитанный файл хешируется с диска и остается ленивым
+                content_hash = node.get("_content_hash")
+                if content_hash is None:
+                    if node["content"] is None:
+                        content_hash = self._hash_real_file(node["_real_path"])
+                    else:
+                        content_hash = hashlib.sha256(node["content"]).digest()
+                    node["_content_hash"] = content_hash
+                self._hash_fields(h, content_hash)
+            else:
+                for name in node["children"]:
+                    self._hash_fields(h, name.encode(), self.nodes[prefix + name]["_hash"])
+            node["_hash"] = h.digest()
+        return self.nodes[path]["_hash"]
 
     def get_vfs_info(self):
         """Информация о VFS"""
         name = os.path.basename(self.physical_path) if self.physical_path else "default_vfs"
-        vfs_data = json.dumps(self.filesystem, sort_keys=True)
-        sha256_hash = hashlib.sha256(vfs_data.encode()).hexdigest()
-        return name, sha256_hash
+        if "_hash" not in self.nodes["/"]:
+            self._preload("/")
+        return name, self._subtree_hash("/").hex()
 
     def list_directory(self, path=None):
         """Список содержимого директории"""
-        if path is None:
-            path = self.current_dir
+        path = self._canonical(path if path is not None else self.current_dir)
         node = self._get_node(path)
         if node and node["type"] == "directory":
-            return list(node["content"].keys())
+            return list(self._dir_children(path))
         return []
 
+    def format_directory(self, path=None):
+        """Содержимое директории одной строкой для ls (кешируется до изменения директории)"""
+        path = self._canonical(path if path is not None else self.current_dir)
+        node = self._get_node(path)
+        if not node or node["type"] != "directory":
+            return ""
+        listing = node.get("_listing")
+        if listing is None:
+            listing = node["_listing"] = "\n".join(self._dir_children(path))
+        return listing
+
     def change_directory(self, path):
         """Смена текущей директории"""
-        if path == "..":
-            if self.current_dir != "/":
-                self.current_dir = os.path.dirname(self.current_dir.rstrip('/')) or "/"
-            return True
-
-        if path.startswith("/"):
-            target_path = path
-        else:
-            target_path = os.path.join(self.current_dir, path).replace("\\", "/")
-
+        target_path = self._canonical(path)
         node = self._get_node(target_path)
         if node and node["type"] == "directory":
             self.current_dir = target_path
             return True
         return False
 
+    def _canonical(self, path):
+        """Абсолютный путь без '.', '..' и лишних '/' (с LRU-кешем)"""
+        key = path if path.startswith("/") else (self.current_dir, path)
+        canonical = self._path_cache.get(key)
+        if canonical is not None:
+            self._path_cache.move_to_end(key)
+            return canonical
+        if not path.startswith("/"):
+            path = posixpath.join(self.current_dir, path)
+        canonical = posixpath.normpath(path)
+        if canonical.startswith("//"):
+            # normpath сохраняет ведущий "//" по POSIX, в VFS он не нужен
+            canonical = "/" + canonical.lstrip("/")
+        # Интернированный ключ совпадает с ключом таблицы узлов по указателю,
+        # поэтому поиск в self.nodes обходится без посимвольного сравнения
+        canonical = self._path_cache[key] = sys.intern(canonical)
+        if len(self._path_cache) > self.PATH_CACHE_SIZE:
+            self._path_cache.popitem(last=False)
+        return canonical
+
     def _get_node(self, path):
         """Получение узла по пути"""
-        if path == "/":
-            return self.filesystem.get("/")
-        parts = path.strip("/").split("/")
-        node = self.filesystem.get("/")
-        for part in parts:
-            if node and node["type"] == "directory" and part in node["content"]:
-                node = node["content"][part]
-            else:
-                return None
+        path = self._canonical(path)
+        node = self.nodes.get(path)
+        if node is None and path != "/":
+            # Узел может быть еще не подгружен: ищем ближайшего известного предка
+            # и раскрываем ленивые директории сверху вниз
+            pending = [path]
+            parent_path = posixpath.dirname(path)
+            while parent_path not in self.nodes:
+                pending.append(parent_path)
+                parent_path = posixpath.dirname(parent_path)
+            for current in reversed(pending):
+                parent = self.nodes.get(parent_path)
+                if parent is None or parent["type"] != "directory" or parent["children"] is not None:
+                    return None
+                self._build_vfs_from_dir(parent_path)
+                parent_path = current
+            node = self.nodes.get(path)
         return node
 
+    def _drop_subtree(self, path):
+        """Удаление узла и всех его потомков из таблицы"""
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            node = self.nodes.pop(current)
+            if node["type"] == "directory" and node["children"]:
+                prefix = current.rstrip("/") + "/"
+                stack.extend(prefix + name for name in node["children"])
+
     def remove(self, path):
         """Удаление файла или директории"""
-        target_path = os.path.join(self.current_dir, path).replace("\\", "/") if not path.startswith("/") else path
-        parent_path = os.path.dirname(target_path)
-        item_name = os.path.basename(target_path)
-        parent_node = self._get_node(parent_path)
-        if parent_node and parent_node["type"] == "directory" and item_name in parent_node["content"]:
-            del parent_node["content"][item_name]
-            return True
-        return False
+        target_path = self._canonical(path)
+        if target_path == "/" or self._get_node(target_path) is None:
+            return False
+        parent_path, item_name = posixpath.split(target_path)
+        parent = self.nodes[parent_path]
+        children = parent["children"]
+        del children[bisect_left(children, item_name)]
+        parent.pop("_listing", None)
+        self._drop_subtree(target_path)
+        self._invalidate(parent_path)
+        return True
 
     def change_owner(self, path, owner):
         """Изменение владельца (эмуляция)"""
         node = self._get_node(path)
         if node:
             node["owner"] = owner
+            self._invalidate(self._canonical(path))
             return True
         return False
 
 class ConfigManager:
     """Менеджер конфигурации"""
+    LOG_BUFFER_SIZE = 64 * 1024
+    LOG_FLUSH_EVERY = 64
+    SCRIPT_READ_WHOLE_LIMIT = 1024 * 1024
+
     def __init__(self):
         self.params = {}
         self.log_file = None
+        self.log_writer = None
+        self._user = None
+        self._unflushed_rows = 0
 
     def load_config(self):
         parser = argparse.ArgumentParser(description='Эмулятор командной строки')
@@ -157,10 +382,13 @@ class ConfigManager:
         if self.params['log_path']:
             try:
                 file_exists = os.path.exists(self.params['log_path'])
-                self.log_file = open(self.params['log_path'], 'a', newline='', encoding='utf-8')
+                self.log_file = open(self.params['log_path'], 'a', buffering=self.LOG_BUFFER_SIZE,
+                                     newline='', encoding='utf-8')
+                atexit.register(self.close)
+                self.log_writer = csv.writer(self.log_file)
+                self._user = getpass.getuser()
                 if not file_exists:
-                    writer = csv.writer(self.log_file)
-                    writer.writerow(['timestamp', 'command', 'success', 'error_message', 'username'])
+                    self.log_writer.writerow(['timestamp', 'command', 'success', 'error_message', 'username'])
             except Exception as e:
                 print(f"Ошибка открытия лог-файла: {e}")
 
@@ -172,63 +400,141 @@ class ConfigManager:
 
     def log_command(self, command, success=True, error_msg=""):
         if self.log_file:
-            writer = csv.writer(self.log_file)
-            writer.writerow([
+            self.log_writer.writerow([
                 datetime.now().isoformat(),
                 command,
                 success,
                 error_msg,
-                getpass.getuser()
+                self._user
             ])
-            self.log_file.flush()
+            # Сброс на диск пачками, а не после каждой команды
+            self._unflushed_rows += 1
+            if self._unflushed_rows >= self.LOG_FLUSH_EVERY:
+                self.log_file.flush()
+                self._unflushed_rows = 0
 
     def execute_startup_script(self, command_handler):
         if not self.params['script_path']:
             return True
         try:
-            with open(self.params['script_path'], 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    print(f"[Скрипт:{line_num}] > {line}")
-                    success, _ = command_handler(line, from_script=True)
-                    if not success:
-                        print(f"Ошибка на строке {line_num}: остановка выполнения")
-                        return False
+            for line_num, line in enumerate(self._script_lines(self.params['script_path']), 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                print(f"[Скрипт:{line_num}] > {line}")
+                success, _ = command_handler(line, from_script=True)
+                if not success:
+                    print(f"Ошибка на строке {line_num}: остановка выполнения")
+                    return False
             return True
         except Exception as e:
             print(f"Ошибка выполнения стартового скрипта: {e}")
             return False
 
+    def _script_lines(self, path):
+        """Строки скрипта: небольшой файл читается целиком, большой - крупными блоками"""
+        if os.path.getsize(path) <= self.SCRIPT_READ_WHOLE_LIMIT:
+            with open(path, 'r', encoding='utf-8') as f:
+                # split('\n'), а не splitlines(): строки делятся только по переводу строки,
+                # как при построчном чтении файла (\r\n уже нормализован)
+                yield from f.read().split('\n')
+        else:
+            with open(path, 'r', encoding='utf-8', buffering=io.DEFAULT_BUFFER_SIZE * 4) as f:
+                yield from f
+
     def close(self):
         if self.log_file:
             self.log_file.close()
+            self.log_file = None
+
+class CommandTrie:
+    """Префиксное дерево имен команд: сокращения и подсказки при опечатках"""
+    def __init__(self, commands, exact_only=()):
+        self.root = {}
+        # Эти команды не разворачиваются из префикса и не предлагаются в подсказках
+        self.exact_only = frozenset(exact_only)
+        for name, handler_name in commands.items():
+            node = self.root
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node[None] = handler_name  # ключ None отмечает конец имени
+
+    @staticmethod
+    def _complete(node, prefix):
+        """Все имена (и их значения) в поддереве узла"""
+        found = []
+        stack = [(node, prefix)]
+        while stack:
+            node, word = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    found.append((word, child))
+                else:
+                    stack.append((child, word + key))
+        return found
+
+    def lookup(self, cmd):
+        """Значение по имени или однозначному сокращению; иначе (None, варианты)"""
+        node, depth = self.root, 0
+        for ch in cmd:
+            child = node.get(ch)
+            if child is None:
+                break
+            node, depth = child, depth + 1
+        if depth == len(cmd) and None in node:
+            return node[None], []
+        matches = [(name, value) for name, value in self._complete(node, cmd[:depth])
+                   if name not in self.exact_only] if depth else []
+        if depth == len(cmd) and len(matches) == 1:
+            return matches[0][1], []
+        return None, sorted(name for name, _ in matches)
 
 class ShellEmulator:
+    # Имя команды -> имя метода-обработчика
+    _COMMANDS = {
+        "ls": "cmd_ls",
+        "cd": "cmd_cd",
+        "whoami": "cmd_whoami",
+        "who": "cmd_who",
+        "rm": "cmd_rm",
+        "chown": "cmd_chown",
+        "vfs-info": "cmd_vfs_info",
+        "help": "cmd_help",
+        "history": "cmd_history",
+        "exit": "cmd_exit"
+    }
+    # Удаление и выход выполняются только по полному имени
+    _COMMAND_TRIE = CommandTrie(_COMMANDS, exact_only=("rm", "exit"))
+    # Разделители те же, что у shlex (он не считает пробелами прочие символы Unicode)
+    _ARG_RE = re.compile(r'[^ \t\r\n]+')
+    OUTPUT_MAX_LINES = 10000
+    HISTORY_SIZE = 1000
+
     def __init__(self, root):
         self.root = root
+        self._handlers = {}
+        self._pending_output = []
+        self._output_flush_scheduled = False
         self.config = ConfigManager()
         if not self.config.load_config():
             messagebox.showerror("Ошибка", "Не удалось загрузить конфигурацию")
             return
 
         self.vfs = VFS(self.config.params['vfs_path'])
-        self.command_history = []
+        self.command_history = deque(maxlen=self.HISTORY_SIZE)
+        self.username = os.getlogin()
+        self.hostname = socket.gethostname()
 
         self.setup_gui()
 
-        motd_node = self.vfs._get_node("/etc/motd")
-        if motd_node and motd_node["type"] == "file":
-            self.print_output(motd_node["content"] + "\n")
+        if self.vfs.motd is not None:
+            self.print_output(self.vfs.decode(self.vfs.motd) + "\n")
 
         if not self.config.execute_startup_script(self.execute_command):
             messagebox.showwarning("Предупреждение", "Стартовый скрипт завершился с ошибкой")
 
     def setup_gui(self):
-        username = os.getlogin()
-        hostname = socket.gethostname()
-        self.root.title(f"Эмулятор - [{username}@{hostname}]")
+        self.root.title(f"Эмулятор - [{self.username}@{self.hostname}]")
         self.root.geometry("800x600")
 
         self.output_area = scrolledtext.ScrolledText(self.root, wrap=tk.WORD, state='disabled')
@@ -245,12 +551,30 @@ class ShellEmulator:
         self.print_output("Добро пожаловать в эмулятор!\nВведите 'help' для списка команд.\n")
 
     def print_output(self, text):
+        # Вывод копится и попадает в виджет одной вставкой, когда Tk простаивает
+        self._pending_output.append(text)
+        if not self._output_flush_scheduled:
+            self._output_flush_scheduled = True
+            self.root.after_idle(self._flush_output)
+
+    def _flush_output(self):
+        self._output_flush_scheduled = False
+        text = "".join(self._pending_output)
+        self._pending_output.clear()
         self.output_area.config(state='normal')
         self.output_area.insert(tk.END, text)
+        # Вывод всегда заканчивается "\n", поэтому последняя строка в индексе пустая
+        lines = int(self.output_area.index('end-1c').split('.')[0]) - 1
+        if lines > self.OUTPUT_MAX_LINES:
+            self.output_area.delete('1.0', f'{lines - self.OUTPUT_MAX_LINES + 1}.0')
         self.output_area.see(tk.END)
         self.output_area.config(state='disabled')
 
     def parse_command(self, cmd_str):
+        # Без кавычек и экранирования shlex не нужен: хватает разбиения регулярным выражением
+        if '"' not in cmd_str and "'" not in cmd_str and '\\' not in cmd_str:
+            parts = self._ARG_RE.findall(cmd_str)
+            return (parts[0], parts[1:]) if parts else ("", [])
         try:
             parts = shlex.split(cmd_str)
             return (parts[0], parts[1:]) if parts else ("", [])
@@ -270,20 +594,15 @@ class ShellEmulator:
         try:
             cmd, args = self.parse_command(cmd_str)
             self.command_history.append(cmd_str)
-            mapping = {
-                "ls": self.cmd_ls,
-                "cd": self.cmd_cd,
-                "whoami": self.cmd_whoami,
-                "who": self.cmd_who,
-                "rm": self.cmd_rm,
-                "chown": self.cmd_chown,
-                "vfs-info": self.cmd_vfs_info,
-                "help": self.cmd_help,
-                "history": self.cmd_history,
-                "exit": lambda a: (True, self.root.quit() or "")
-            }
-            func = mapping.get(cmd)
-            result = func(args) if func else (False, f"Ошибка: неизвестная команда '{cmd}'")
+            func, candidates = self._get_handler(cmd)
+            if func:
+                result = func(args)
+            elif candidates and all(c.startswith(cmd) for c in candidates):
+                result = (False, f"Ошибка: неоднозначная команда '{cmd}': {', '.join(candidates)}")
+            elif candidates:
+                result = (False, f"Ошибка: неизвестная команда '{cmd}'. Возможно, имелось в виду: {', '.join(candidates)}")
+            else:
+                result = (False, f"Ошибка: неизвестная команда '{cmd}'")
             success, out = result
             if out:
                 self.print_output(str(out) + "\n")
@@ -295,10 +614,20 @@ class ShellEmulator:
             self.config.log_command(cmd_str, False, msg)
             return False, msg
 
+    def _get_handler(self, cmd):
+        """Обработчик команды (или сокращения) и варианты, если команда не найдена"""
+        func = self._handlers.get(cmd)
+        if func is None:
+            name, candidates = self._COMMAND_TRIE.lookup(cmd)
+            if name is None:
+                return None, candidates
+            func = self._handlers[cmd] = getattr(self, name)
+        return func, []
+
     def cmd_ls(self, args):
         path = args[0] if args else None
-        items = self.vfs.list_directory(path)
-        return True, "\n".join(items) if items else "Директория пуста"
+        listing = self.vfs.format_directory(path)
+        return True, listing or "Директория пуста"
 
     def cmd_cd(self, args):
         if not args:
@@ -306,11 +635,10 @@ class ShellEmulator:
         ok = self.vfs.change_directory(args[0])
         return (True, f"Текущая директория: {self.vfs.current_dir}") if ok else (False, f"Директория не найдена: {args[0]}")
 
-    def cmd_whoami(self, args): return True, os.getlogin()
+    def cmd_whoami(self, args): return True, self.username
     def cmd_who(self, args):
-        users = ["admin", os.getlogin(), "guest"]
-        host = socket.gethostname()
-        return True, "\n".join(f"{u}@{host}" for u in users)
+        users = ["admin", self.username, "guest"]
+        return True, "\n".join(f"{u}@{self.hostname}" for u in users)
 
     def cmd_rm(self, args):
         if not args: return False, "Использование: rm <файл>"
@@ -328,6 +656,10 @@ class ShellEmulator:
     def cmd_history(self, args):
         return True, "\n".join(self.command_history)
 
+    def cmd_exit(self, args):
+        self.root.quit()
+        return True, ""
+
     def cmd_help(self, args):
         return True, """Доступные команды:
   ls [путь]            - список файлов
@@ -340,6 +672,8 @@ class ShellEmulator:
   history              - история команд
   help                 - справка
   exit                 - выход из эмулятора
+Команды можно сокращать до однозначного префикса (например, hi -> history),
+кроме rm и exit: их нужно вводить полностью.
 """
 
 def main():